@@ -2,7 +2,8 @@ import logging
 import random
 import sys
 import time
-from enum import Enum
+from collections import deque
+from enum import IntEnum
 
 logger = logging.getLogger()
 logging.basicConfig(stream=sys.stdout, level=logging.DEBUG)
@@ -12,13 +13,23 @@ class ElevatorError(Exception):
     """Exception class for Elevator-related errors."""
 
 
-class Direction(Enum):
-    IDLE = 0
-    UP = 1
-    DOWN = -1
+# Directions are stored as plain ints, so hot paths compare ints instead of enum members
+IDLE, UP, DOWN = 0, 1, -1
+
+
+class Direction(IntEnum):
+    IDLE = IDLE
+    UP = UP
+    DOWN = DOWN
+
+
+def _skip_floor(offset: int, floor: int) -> int:
+    """Map an offset drawn from range(floors - 1) onto the floors other than floor, keeping the draw uniform."""
+    return offset if offset < floor else offset + 1
 
 
 class Passenger:
+    __slots__ = ("id", "start_floor", "target_floor", "direction", "finished", "in_elevator")
     population: int = 0
 
     def __init__(self, floors: int, start_floor: int = None, target_floor: int = None):
@@ -27,11 +38,12 @@ class Passenger:
         self.id: int = Passenger.population
         Passenger.population += 1
         self.start_floor: int = random.randint(0, floors-1) if start_floor is None else start_floor
-        self.target_floor: int = random.choice([i for i in range(floors) if i != self.start_floor]) if target_floor is None else target_floor
-        self.direction: Direction = (Direction.UP if self.start_floor < self.target_floor else Direction.DOWN)
+        if target_floor is None:
+            target_floor = _skip_floor(random.randrange(floors - 1), self.start_floor)
+        self.target_floor: int = target_floor
+        self.direction: int = UP if self.start_floor < self.target_floor else DOWN
         self.finished: bool = False
         self.in_elevator: bool = False
-        self.elevator_spot: bool = False
 
     def __repr__(self) -> str:
         return f"Passenger Start: {self.start_floor}, Target: {self.target_floor}"
@@ -46,19 +58,34 @@ class Passenger:
 
 
 class Elevator:
-    def __init__(self, max_floor: int, capacity: int = 6):
+    def __init__(self, max_floor: int, capacity: int = 6, tick_delay: float = 0.0, collect_log: bool = True):
         self.max_floor: int = max_floor
         self.capacity: int = capacity
-        self.elevator_population: list[Passenger] = []
+        # Keyed by passenger id, so iteration follows boarding order
+        self.elevator_population: dict[int, Passenger] = {}
         self.floor_population: list[int] = [0] * (max_floor)
+        # Passengers waiting on each floor in call order, split by the direction they are going,
+        # and how many passengers inside want each floor
+        self.waiting_up: list[deque[Passenger]] = [deque() for _ in range(max_floor)]
+        self.waiting_down: list[deque[Passenger]] = [deque() for _ in range(max_floor)]
+        self.target_counts: list[int] = [0] * max_floor
+        # Bit i of call_mask is set while anyone waits on floor i, bit i of target_mask while anyone inside wants floor i
+        self.call_mask: int = 0
+        self.target_mask: int = 0
+        # Passengers who called the elevator and have not exited yet, whether waiting or inside
+        self.pending_count: int = 0
         self.floor: int = 0
         self.doors_opened: bool = False
-        self.direction: Direction = Direction.IDLE
+        self.direction: int = IDLE
         self.target_floor: int = 0
         self.log: list[str] = []
+        # Seconds to wait after each move. Purely for aesthetics when watching the simulation
+        self.tick_delay: float = tick_delay
+        # Keep entries in self.log. Can be switched off for long runs where only the outcome matters
+        self.collect_log: bool = collect_log
 
     def __repr__(self) -> str:
-        return f"Elevator Current: {self.floor} {self.direction.name}, Target: {self.target_floor}"
+        return f"Elevator Current: {self.floor} {Direction(self.direction).name}, Target: {self.target_floor}"
 
     @property
     def is_full(self) -> bool:
@@ -66,23 +93,30 @@ class Elevator:
 
     @property
     def idle(self) -> bool:
-        return self.direction == Direction.IDLE
+        return self.direction == IDLE
 
     @property
     def going_up(self) -> bool:
-        return self.direction == Direction.UP
+        return self.direction == UP
 
     @property
     def going_down(self) -> bool:
-        return self.direction == Direction.DOWN
+        return self.direction == DOWN
+
+    @property
+    def logging_enabled(self) -> bool:
+        """Returns True if log entries go anywhere, so callers can skip formatting them otherwise."""
+        return self.collect_log or logger.isEnabledFor(logging.INFO)
 
     def add_to_log(self, entry: str):
         """
         Add an entry to the elevator's log.
         self.log needed for testing purposes
         """
-        self.log.append(entry)
-        logger.info(entry)
+        if self.collect_log:
+            self.log.append(entry)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(entry)
 
     def open_doors(self):
         if not self.doors_opened:
@@ -94,9 +128,25 @@ class Elevator:
             self.doors_opened = False
             self.add_to_log("Closed doors")
 
-    def call_elevator(self, floor: int):
-        """Call elevator from the outside."""
+    def call_elevator(self, floor: int, passenger: Passenger = None):
+        """Call elevator from the outside. The passenger, if given, is queued on that floor."""
         self.floor_population[floor] += 1
+        self.pending_count += 1
+        if passenger is not None:
+            self._waiting_queue(passenger).append(passenger)
+        self.call_mask |= 1 << floor
+
+    def _waiting_queue(self, passenger: Passenger) -> deque[Passenger]:
+        """Get the queue the passenger waits in on their start floor."""
+        waiting = self.waiting_up if passenger.direction == UP else self.waiting_down
+        return waiting[passenger.start_floor]
+
+    def _can_board(self, direction: int) -> bool:
+        """
+        Returns True if passengers going in the given direction may board on the current floor.
+        That is when the elevator goes the same way, or it is at either end of the building or at its target floor
+        """
+        return self.direction == direction or self.floor == 0 or self.floor == self.max_floor - 1 or self.floor == self.target_floor
 
     def onboard(self, passenger: Passenger):
         """
@@ -107,94 +157,168 @@ class Elevator:
         if passenger.start_floor != self.floor:
             return
         if self.is_full:
-            self.add_to_log(f"Elevator is full. Passenger {passenger.id} needs to wait.")
+            if self.logging_enabled:
+                self.add_to_log(f"Elevator is full. Passenger {passenger.id} needs to wait.")
             return
-        if self.direction == passenger.direction or self.floor == 0 or self.floor == self.max_floor - 1 or self.floor == self.target_floor:
-            self.open_doors()
-            self.elevator_population.append(passenger)
-            passenger.in_elevator = True
-            self.floor_population[passenger.start_floor] -= 1
+        if self._can_board(passenger.direction):
+            self._board(passenger, self._waiting_queue(passenger))
+
+    def _board(self, passenger: Passenger, queue: deque[Passenger]):
+        """Take the passenger out of their waiting queue and into the elevator, without checking if they may board."""
+        self.open_doors()
+        if queue and queue[0] is passenger:
+            queue.popleft()
+        elif passenger in queue:
+            queue.remove(passenger)
+        self.elevator_population[passenger.id] = passenger
+        passenger.in_elevator = True
+        self.floor_population[passenger.start_floor] -= 1
+        self.target_counts[passenger.target_floor] += 1
+        if not self.floor_population[passenger.start_floor]:
+            self.call_mask &= ~(1 << passenger.start_floor)
+        self.target_mask |= 1 << passenger.target_floor
+        if self.logging_enabled:
             self.add_to_log(f"Passenger {passenger.start_floor} -> {passenger.target_floor} entered at floor {self.floor}")
 
+    def board_waiting(self):
+        """
+        Onboard passengers waiting on the current floor in call order, starting with the elevator's direction.
+        Stops as soon as the elevator is full
+        """
+        directions = (DOWN, UP) if self.going_down else (UP, DOWN)
+        for direction in directions:
+            if not self._can_board(direction):
+                continue
+            queue = (self.waiting_up if direction == UP else self.waiting_down)[self.floor]
+            while queue:
+                if self.is_full:
+                    # Goes through the checked path so the full elevator is logged the same way
+                    self.onboard(queue[0])
+                    return
+                self._board(queue[0], queue)
+
     def remove(self, passenger: Passenger):
         """Remove a passenger from the elevator when they reach their target floor."""
-        if passenger.target_floor != self.floor:
+        if passenger.target_floor != self.floor or passenger.id not in self.elevator_population:
             return
         self.open_doors()
         passenger.in_elevator = False
         passenger.finished = True
-        self.elevator_population.remove(passenger)
-        self.add_to_log(f"Passenger {passenger.start_floor} -> {passenger.target_floor} exited at floor {self.floor}")
+        del self.elevator_population[passenger.id]
+        self.pending_count -= 1
+        self.target_counts[passenger.target_floor] -= 1
+        if not self.target_counts[passenger.target_floor]:
+            self.target_mask &= ~(1 << passenger.target_floor)
+        if self.logging_enabled:
+            self.add_to_log(f"Passenger {passenger.start_floor} -> {passenger.target_floor} exited at floor {self.floor}")
 
     def get_elevator_buttons(self) -> list[bool]:
         """Get the status of the elevator buttons indicating passengers target floors."""
-        elevator_buttons = [False] * self.max_floor
-        for passenger in self.elevator_population:
-            elevator_buttons[passenger.target_floor] = True
-        return elevator_buttons
-
-    def move(self):
-        """Move the elevator to the next floor based on the target floor and direction."""
-        elevator_buttons = self.get_elevator_buttons()
-        # Get floors where buttons are pressed
-        floors_people_want_to_go_to = [i for i in range(len(elevator_buttons)) if elevator_buttons[i]]
-        floors_people_want_to_go_to.extend(
-            [floor for floor in range(self.max_floor) if bool(self.floor_population[floor])]
-        )
-        if not floors_people_want_to_go_to:
+        return [bool(self.target_mask >> floor & 1) for floor in range(self.max_floor)]
+
+    def move(self, look_ahead: bool = False):
+        """
+        Move the elevator to the next floor, then wait tick_delay seconds per floor passed if animation is on.
+        With look_ahead the elevator goes straight to the next floor where it needs to stop, skipping empty floors
+        """
+        floors_moved = self._step(look_ahead)
+        if self.tick_delay:
+            time.sleep(self.tick_delay * floors_moved)
+
+    def _next_stop(self, pending_floors: int) -> int:
+        """Get the nearest floor with a pressed button in the current direction, or the next floor if there is none."""
+        if self.going_up:
+            above = pending_floors >> (self.floor + 1)
+            if above:
+                return self.floor + (above & -above).bit_length()
+        elif self.going_down:
+            below = pending_floors & ((1 << self.floor) - 1)
+            if below:
+                return below.bit_length() - 1
+        return self.floor + self.direction
+
+    def _step(self, look_ahead: bool = False) -> int:
+        """Move the elevator based on the target floor and direction. Returns the number of floors passed."""
+        pending_floors = self.call_mask | self.target_mask
+        if not pending_floors:
             raise ElevatorError("Elevator is moving, but no buttons pressed")
-        highest_floor = max(floors_people_want_to_go_to)
-        lowest_floor = min(floors_people_want_to_go_to)
+        # Highest and lowest set bits are the highest and lowest floors where buttons are pressed
+        highest_floor = pending_floors.bit_length() - 1
+        lowest_floor = (pending_floors & -pending_floors).bit_length() - 1
         # If elevator reached highest or lowest needed floor - change direction. Set direction for idle
         if self.idle:
             self.target_floor = highest_floor
-            self.direction = Direction.UP if highest_floor > self.floor else Direction.DOWN
+            self.direction = UP if highest_floor > self.floor else DOWN
         elif self.going_up and self.floor >= highest_floor:
             self.target_floor = lowest_floor
-            self.direction = Direction.DOWN
+            self.direction = DOWN
         elif self.going_down and self.floor <= lowest_floor:
             self.target_floor = highest_floor
-            self.direction = Direction.UP
+            self.direction = UP
 
         if self.target_floor <= -1 or self.target_floor >= self.max_floor:
             raise ElevatorError(f"Elevator is outside of bounds. Target: {self.target_floor}, max floor: {self.max_floor}")
 
         self.close_doors()
-        self.floor += self.direction.value
-        self.add_to_log(f"Elevator moving {self.direction.name} to {self.floor}")
-        # Sleep added to simulate ticks. Purely for aesthetics
-        time.sleep(0.5)
+        next_floor = self._next_stop(pending_floors) if look_ahead else self.floor + self.direction
+        floors_moved = abs(next_floor - self.floor)
+        self.floor = next_floor
+        if self.logging_enabled:
+            entry = f"Elevator moving {Direction(self.direction).name} to {self.floor}"
+            if floors_moved > 1:
+                entry += f" ({floors_moved} floors)"
+            self.add_to_log(entry)
+        return floors_moved
 
 
 def generate_passengers(num_people: int, elevator: Elevator) -> list[Passenger]:
+    floors = elevator.max_floor
+    if floors < 2:
+        raise ValueError("Floors count must be more than 1")
+    # Draw every start floor and target offset in one call each instead of two calls per passenger
+    start_floors = random.choices(range(floors), k=num_people)
+    target_offsets = random.choices(range(floors - 1), k=num_people)
     total_population = []
-    for _ in range(num_people):
-        passenger = Passenger(elevator.max_floor)
+    for start_floor, target_offset in zip(start_floors, target_offsets):
+        passenger = Passenger(floors, start_floor, _skip_floor(target_offset, start_floor))
         total_population.append(passenger)
-        elevator.call_elevator(passenger.start_floor)
+        elevator.call_elevator(start_floor, passenger)
 
     return total_population
 
 
-def simulate_elevator_usage(num_people: int, num_floors: int, capacity: int = 6) -> Elevator:
-    elevator = Elevator(num_floors, capacity)
-    total_population = generate_passengers(num_people, elevator)
+def simulate_elevator_usage(
+    num_people: int, num_floors: int, capacity: int = 6, animate: bool = False, collect_log: bool = True
+) -> Elevator:
+    elevator = Elevator(num_floors, capacity, tick_delay=0.5 if animate else 0.0, collect_log=collect_log)
+    generate_passengers(num_people, elevator)
 
-    # Move elevator and onboard people
-    while sum(elevator.floor_population) + len(elevator.elevator_population) > 0:
-        for passenger in total_population:
-            if passenger.in_elevator and passenger.arrived(elevator.floor):
-                elevator.remove(passenger)
+    # Bind the methods and the passenger container once. Floor, masks and pending_count change every tick,
+    # so they are still read from the elevator
+    elevator_population = elevator.elevator_population
+    remove = elevator.remove
+    board_waiting = elevator.board_waiting
+    move = elevator.move
 
-            if passenger.waiting():
-                elevator.onboard(passenger)
-
-        if sum(elevator.floor_population) + len(elevator.elevator_population) == 0:
+    # Move elevator and onboard people
+    while elevator.pending_count > 0:
+        floor = elevator.floor
+        # Only passengers inside the elevator or waiting on the current floor can be affected
+        if elevator.target_mask >> floor & 1:
+            # Snapshot the passengers, since remove() deletes from elevator_population
+            for passenger in list(elevator_population.values()):
+                if passenger.target_floor == floor:
+                    remove(passenger)
+
+        if elevator.call_mask >> floor & 1:
+            board_waiting()
+
+        if not elevator.pending_count:
             elevator.close_doors()
-            elevator.direction = Direction.IDLE
+            elevator.direction = IDLE
             break
 
-        elevator.move()
+        move(look_ahead=True)
     elevator.add_to_log("All passengers arrived to their destination floors")
 
     return elevator
@@ -204,7 +328,7 @@ def run():
     num_people = 10
     num_floors = 5
     capacity = 4
-    simulate_elevator_usage(num_people, num_floors, capacity)
+    simulate_elevator_usage(num_people, num_floors, capacity, animate=True)
 
 
 if __name__ == "__main__":
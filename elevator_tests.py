@@ -1,3 +1,5 @@
+import random
+
 import pytest
 
 from elevator import Direction, Elevator, ElevatorError, Passenger, generate_passengers, simulate_elevator_usage
@@ -34,6 +36,16 @@ class TestPassenger:
         passengers_list = generate_passengers(passengers_count, elevator)
         assert len(passengers_list) == passengers_count
         assert isinstance(passengers_list[0], Passenger)
+        assert all(passenger.start_floor != passenger.target_floor for passenger in passengers_list)
+        assert sum(elevator.floor_population) == passengers_count
+
+    def test_generate_passengers_one_floor(self):
+        elevator = Elevator(max_floor=1)
+        with pytest.raises(ValueError) as exc_info:
+            generate_passengers(3, elevator)
+
+        assert str(exc_info.value) == "Floors count must be more than 1"
+        assert elevator.pending_count == 0
 
 
 class TestElevator:
@@ -42,7 +54,7 @@ class TestElevator:
         assert elevator.floor == 0
         assert elevator.direction == Direction.IDLE
         assert elevator.capacity == 8
-        assert elevator.elevator_population == []
+        assert elevator.elevator_population == {}
 
     def test_elevator_open_close_doors(self):
         elevator = Elevator(5)
@@ -69,7 +81,8 @@ class TestElevator:
         elevator.remove(passenger)
         assert passenger.in_elevator is False
         assert passenger.finished is True
-        assert passenger not in elevator.elevator_population
+        assert passenger.id not in elevator.elevator_population
+        assert elevator.get_elevator_buttons() == [False] * 5
         assert f"Passenger {passenger.start_floor} -> {passenger.target_floor} exited at floor {elevator.floor}" in elevator.log
 
     def test_cant_remove(self):
@@ -81,6 +94,33 @@ class TestElevator:
         assert passenger.finished is False
         assert f"Passenger {passenger.start_floor} -> {passenger.target_floor} exited at floor {elevator.floor}" not in elevator.log
 
+    def test_remove_twice(self):
+        elevator = Elevator(5)
+        passenger1 = Passenger(5, start_floor=0, target_floor=1)
+        passenger2 = Passenger(5, start_floor=3, target_floor=4)
+        elevator.call_elevator(passenger1.start_floor, passenger1)
+        elevator.call_elevator(passenger2.start_floor, passenger2)
+        elevator.onboard(passenger1)
+        elevator.move()
+
+        elevator.remove(passenger1)
+        elevator.remove(passenger1)
+        assert elevator.target_counts[1] == 0
+        assert elevator.pending_count == 1
+        assert elevator.log.count(f"Passenger {passenger1.start_floor} -> {passenger1.target_floor} exited at floor 1") == 1
+
+    def test_remove_passenger_not_onboard(self):
+        elevator = Elevator(5)
+        passenger = Passenger(5, start_floor=1, target_floor=0)
+        elevator.call_elevator(passenger.start_floor, passenger)
+
+        elevator.remove(passenger)
+        assert passenger.finished is False
+        assert elevator.pending_count == 1
+        assert elevator.target_counts[0] == 0
+        assert list(elevator.waiting_down[1]) == [passenger]
+        assert elevator.call_mask == 0b10
+
     def test_onboard_passenger_from_other_floor(self):
         elevator = Elevator(5)
         passenger = Passenger(5, start_floor=2)
@@ -91,6 +131,71 @@ class TestElevator:
         assert elevator.floor_population[passenger.start_floor] == 1
         assert len(elevator.elevator_population) == 0
 
+    def test_onboard_passenger_going_other_way(self):
+        elevator = Elevator(5)
+        passenger1 = Passenger(5, start_floor=0, target_floor=3)
+        passenger2 = Passenger(5, start_floor=1, target_floor=0)
+        elevator.call_elevator(passenger1.start_floor, passenger1)
+        elevator.call_elevator(passenger2.start_floor, passenger2)
+        elevator.onboard(passenger1)
+        elevator.move()
+
+        elevator.onboard(passenger2)
+        assert elevator.floor == 1
+        assert passenger2.in_elevator is False
+        assert list(elevator.waiting_down[1]) == [passenger2]
+
+    def test_onboard_after_direction_change(self):
+        elevator = Elevator(5)
+        elevator.floor = 2
+        elevator.direction = Direction.UP
+        passenger = Passenger(5, start_floor=2, target_floor=0)
+        elevator.call_elevator(passenger.start_floor, passenger)
+
+        elevator.direction = Direction.DOWN
+        elevator.onboard(passenger)
+        assert passenger.in_elevator is True
+
+    def test_onboard_after_floor_change(self):
+        elevator = Elevator(6)
+        elevator.floor = 3
+        passenger = Passenger(6, start_floor=3, target_floor=1)
+        elevator.call_elevator(passenger.start_floor, passenger)
+
+        elevator.onboard(passenger)
+        assert passenger.in_elevator is False
+        elevator.board_waiting()
+        assert passenger.in_elevator is False
+
+        elevator.target_floor = 3
+        elevator.board_waiting()
+        assert passenger.in_elevator is True
+
+    def test_board_waiting_until_full(self):
+        elevator = Elevator(5, capacity=2)
+        passengers = [Passenger(5, start_floor=0, target_floor=i) for i in (1, 2, 3)]
+        for passenger in passengers:
+            elevator.call_elevator(passenger.start_floor, passenger)
+
+        elevator.board_waiting()
+        assert list(elevator.elevator_population.values()) == passengers[:2]
+        assert list(elevator.waiting_up[0]) == passengers[2:]
+        assert elevator.log[-1] == f"Elevator is full. Passenger {passengers[2].id} needs to wait."
+
+    def test_call_elevator_queues_passenger(self):
+        elevator = Elevator(5)
+        passenger = Passenger(5, start_floor=0, target_floor=3)
+        elevator.call_elevator(passenger.start_floor, passenger)
+        assert list(elevator.waiting_up[0]) == [passenger]
+        assert elevator.call_mask == 0b1
+
+        elevator.onboard(passenger)
+        assert len(elevator.waiting_up[0]) == 0
+        assert elevator.target_counts[3] == 1
+        assert elevator.call_mask == 0
+        assert elevator.target_mask == 0b1000
+        assert elevator.get_elevator_buttons() == [False, False, False, True, False]
+
     def test_move(self):
         elevator = Elevator(5)
         passenger = Passenger(5, start_floor=0, target_floor=1)
@@ -98,6 +203,41 @@ class TestElevator:
         elevator.onboard(passenger)
         elevator.move()
         assert elevator.floor == 1
+        assert elevator.log[-1] == "Elevator moving UP to 1"
+
+    def test_move_look_ahead(self):
+        elevator = Elevator(10)
+        passenger1 = Passenger(10, start_floor=0, target_floor=7)
+        passenger2 = Passenger(10, start_floor=4, target_floor=9)
+        elevator.call_elevator(passenger1.start_floor, passenger1)
+        elevator.call_elevator(passenger2.start_floor, passenger2)
+        elevator.onboard(passenger1)
+
+        elevator.move(look_ahead=True)
+        assert elevator.floor == 4
+        assert elevator.direction == Direction.UP
+        elevator.onboard(passenger2)
+
+        elevator.move(look_ahead=True)
+        assert elevator.floor == 7
+        assert elevator.log[-1] == "Elevator moving UP to 7 (3 floors)"
+        elevator.remove(passenger1)
+
+        elevator.move(look_ahead=True)
+        assert elevator.floor == 9
+        assert elevator.log[-1] == "Elevator moving UP to 9 (2 floors)"
+
+    def test_move_tick_delay(self, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr("time.sleep", sleeps.append)
+        elevator = Elevator(5)
+        elevator.onboard(Passenger(5, start_floor=0, target_floor=2))
+        elevator.move()
+        assert sleeps == []
+
+        elevator.tick_delay = 0.5
+        elevator.move()
+        assert sleeps == [0.5]
 
     def test_move_fail(self):
         elevator = Elevator(5)
@@ -106,6 +246,16 @@ class TestElevator:
             elevator.move()
         assert str(exc_info.value) == "Elevator is moving, but no buttons pressed"
 
+    def test_move_fail_after_last_passenger_exits(self):
+        elevator = Elevator(5)
+        passenger = Passenger(5, start_floor=0, target_floor=1)
+        elevator.call_elevator(passenger.start_floor, passenger)
+        elevator.onboard(passenger)
+        elevator.move()
+        elevator.remove(passenger)
+        with pytest.raises(ElevatorError):
+            elevator.move()
+
     def test_elevator_call_onboard_move(self):
         elevator = Elevator(5)
         passenger1 = Passenger(5, start_floor=0, target_floor=2)
@@ -184,6 +334,23 @@ class TestElevator:
         assert joined_log.count("entered") == joined_log.count("exited")
         assert joined_log.count("opened") == joined_log.count("closed")
 
+    def test_simulate_is_reproducible_with_seed(self, monkeypatch):
+        # Passenger ids appear in the log, so restart them for each run
+        monkeypatch.setattr(Passenger, "population", 0)
+        random.seed(1)
+        first_log = simulate_elevator_usage(300, 10, 8).log
+        monkeypatch.setattr(Passenger, "population", 0)
+        random.seed(1)
+        second_log = simulate_elevator_usage(300, 10, 8).log
+
+        assert first_log == second_log
+
+    def test_simulate_without_collecting_log(self):
+        elevator = simulate_elevator_usage(20, 5, 4, collect_log=False)
+
+        assert elevator.log == []
+        assert elevator.pending_count == 0
+
     def test_zero_passengers(self):
         number_of_passengers = 0
         max_floor = 4